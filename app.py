@@ -1,35 +1,216 @@
 from fastapi import FastAPI, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
+from jinja2 import Environment, FileSystemLoader
+import json
+import math
 import sqlite3
+from collections import OrderedDict
+import queue
+import itertools
+import threading
+from contextlib import asynccontextmanager, contextmanager
 from pathlib import Path
 from datetime import datetime, date
 import os
-from typing import Set
+from typing import AsyncIterator, ContextManager, Iterator, Optional, Set, Tuple, Union
 
 DB_PATH = Path(os.environ.get("DB_PATH", "stats.db"))
-
-app = FastAPI()
-app.mount("/assets", StaticFiles(directory="assets"), name="assets")
-
-
-def db():
-    conn = sqlite3.connect(DB_PATH)
+# Read connections; matches the size of the threadpool FastAPI runs sync handlers in.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "40"))
+# Run PRAGMA optimize every N pool checkins so the long-lived connections keep
+# the query planner's statistics fresh without paying for it on each request.
+DB_OPTIMIZE_EVERY = 1000
+# Stats shown per home page; older ones are behind a "Show older" link.
+HOME_PAGE_SIZE = 200
+# Bumped when init_db() gains a migration; databases already at this
+# PRAGMA user_version skip the migration scans on startup.
+SCHEMA_VERSION = 1
+# Seconds between truncating WAL checkpoints, which keep stats.db-wal small
+# after bursts of tiny writes (e.g. repeated +1 taps).
+WAL_CHECKPOINT_INTERVAL = 60
+
+def _connect(isolation_level: Optional[str] = "") -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        DB_PATH, check_same_thread=False, cached_statements=256, isolation_level=isolation_level
+    )
     conn.row_factory = sqlite3.Row
+    # WAL lets readers run alongside a writer, and with synchronous=NORMAL a
+    # commit only needs a single sync of the WAL file.
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute("PRAGMA cache_size = -16000;")  # 16 MB
+    conn.execute("PRAGMA mmap_size = 268435456;")  # 256 MB
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    conn.execute("PRAGMA busy_timeout = 5000;")
+    conn.execute("PRAGMA wal_autocheckpoint = 1000;")
     conn.execute("PRAGMA foreign_keys = ON;")
     return conn
 
 
+# Long-lived connections shared by all requests, so SQLite keeps its page cache
+# warm and we don't pay connect + PRAGMA setup on every hit. WAL lets the read
+# connections run concurrently; writes all go through a single connection whose
+# transactions start with BEGIN IMMEDIATE, so writers queue here instead of
+# racing for SQLite's write lock (and hitting SQLITE_BUSY on lock upgrade).
+_read_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=DB_POOL_SIZE)
+_write_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=1)
+_pool_releases = itertools.count(1)
+# Set while the pools are filled. The lifespan handler opens them at startup, and
+# a request served without it (e.g. a TestClient outside its "with" block, or
+# after shutdown drained them) opens them on first checkout instead of waiting
+# on an empty queue forever.
+_pools_open = False
+_pools_lock = threading.Lock()
+# Seconds a checkout waits on an empty pool before re-checking that the pools
+# are still open (a drain empties them for good until they are reopened).
+_POOL_WAIT = 1.0
+
+
+def _fill_pools() -> None:
+    while not _read_pool.full():
+        _read_pool.put_nowait(_connect())
+    while not _write_pool.full():
+        _write_pool.put_nowait(_connect(isolation_level="IMMEDIATE"))
+
+
+@contextmanager
+def _checkout(pool: "queue.Queue[sqlite3.Connection]") -> Iterator[sqlite3.Connection]:
+    while True:
+        if not _pools_open:
+            _open_db()
+        try:
+            conn = pool.get(timeout=_POOL_WAIT)
+            break
+        except queue.Empty:
+            continue
+    try:
+        yield conn
+    finally:
+        try:
+            # Never hand a half-finished transaction to the next request.
+            if conn.in_transaction:
+                conn.rollback()
+            if next(_pool_releases) % DB_OPTIMIZE_EVERY == 0:
+                conn.execute("PRAGMA optimize;")
+        finally:
+            # A connection outlives its pool if a drain ran while it was checked
+            # out; close it then, or if the pools were refilled and are full.
+            returned = False
+            with _pools_lock:
+                if _pools_open:
+                    try:
+                        pool.put_nowait(conn)
+                        returned = True
+                    except queue.Full:
+                        pass
+            if not returned:
+                conn.close()
+
+
+def read_conn() -> ContextManager[sqlite3.Connection]:
+    return _checkout(_read_pool)
+
+
+def write_conn() -> ContextManager[sqlite3.Connection]:
+    return _checkout(_write_pool)
+
+
+def _drain_pools() -> None:
+    global _pools_open
+    with _pools_lock:
+        _pools_open = False
+        for pool in (_read_pool, _write_pool):
+            while True:
+                try:
+                    conn = pool.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    conn.execute("PRAGMA optimize;")
+                finally:
+                    conn.close()
+
+
+# Request-time SQL. Every statement is a fixed string (parameters only), so each
+# pooled connection prepares it once and then serves it from its statement cache.
+# Newest first, one page at a time: the first page passes the largest rowid as
+# the bound, older pages the id of the last stat shown.
+_SQL_HOME_LIST = "SELECT id, name, unit, kind FROM stats WHERE id < ? ORDER BY id DESC LIMIT ?"
+_SQL_STAT_COUNT = "SELECT COUNT(*) FROM stats"
+_SQL_STAT_BY_ID = "SELECT id, name, unit, kind FROM stats WHERE id = ?"
+_SQL_STAT_KIND = "SELECT kind FROM stats WHERE id = ?"
+_SQL_INSERT_STAT = "INSERT INTO stats (name, unit, kind, created_at) VALUES (?, ?, ?, ?)"
+_SQL_DELETE_STAT = "DELETE FROM stats WHERE id = ?"
+_SQL_NUMERIC_ENTRIES_BY_STAT = (
+    "SELECT id, day, value_num, note FROM entries WHERE stat_id = ? ORDER BY day DESC, id DESC LIMIT 100"
+)
+_SQL_RATIO_ENTRIES_BY_STAT = (
+    "SELECT id, day, value_hits, value_total, note FROM entries WHERE stat_id = ? ORDER BY day DESC, id DESC LIMIT 100"
+)
+_SQL_DAILY_ENTRIES_BY_STAT = "SELECT id, day, value_num, note FROM entries WHERE stat_id = ? ORDER BY day DESC LIMIT 60"
+# Inserts only if the stat exists and has the given kind (last two parameters).
+_SQL_INSERT_ENTRY_FOR_KIND = (
+    "INSERT INTO entries (stat_id, day, value_num, value_bool, value_hits, value_total, note, created_at) "
+    "SELECT ?, ?, ?, ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM stats WHERE id = ? AND kind = ?)"
+)
+# count_daily rows are tagged daily = 1 and kept unique per (stat_id, day) by
+# idx_entries_count_daily, so setting or bumping a day is a single UPSERT.
+_SQL_UPSERT_DAILY_COUNT = (
+    "INSERT INTO entries (stat_id, day, value_num, note, created_at, daily) "
+    "SELECT ?, ?, ?, ?, ?, 1 WHERE EXISTS (SELECT 1 FROM stats WHERE id = ? AND kind = 'count_daily') "
+    "ON CONFLICT(stat_id, day) WHERE daily = 1 DO UPDATE SET "
+    "value_num = excluded.value_num, note = excluded.note, created_at = excluded.created_at"
+)
+_SQL_UPSERT_DAILY_INCREMENT = (
+    "INSERT INTO entries (stat_id, day, value_num, created_at, daily) "
+    "SELECT ?, ?, 1, ?, 1 WHERE EXISTS (SELECT 1 FROM stats WHERE id = ? AND kind = 'count_daily') "
+    "ON CONFLICT(stat_id, day) WHERE daily = 1 DO UPDATE SET "
+    "value_num = CAST(COALESCE(value_num, 0) AS INTEGER) + 1, created_at = excluded.created_at"
+)
+_SQL_DELETE_ENTRY = "DELETE FROM entries WHERE id = ? RETURNING stat_id"
+
+
+_checkpoint_stop = threading.Event()
+_checkpoint_thread: Optional[threading.Thread] = None
+
+
+def _checkpoint_loop() -> None:
+    conn = _connect()
+    try:
+        while not _checkpoint_stop.wait(WAL_CHECKPOINT_INTERVAL):
+            try:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+            except sqlite3.Error:
+                # Busy or locked: the next round (or autocheckpoint) will catch up.
+                pass
+    finally:
+        conn.close()
+
+
 def _table_columns(conn: sqlite3.Connection, table: str) -> Set[str]:
     rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
     return {r["name"] for r in rows}
 
 
-def add_column_if_missing(conn: sqlite3.Connection, table: str, col: str, ddl: str) -> None:
-    cols = _table_columns(conn, table)
-    if col not in cols:
-        conn.execute(f"ALTER TABLE {table} ADD COLUMN {ddl}")
-        conn.commit()
+# Columns added after the first releases; older databases get them via ALTER TABLE.
+_ADDED_COLUMNS = {
+    "stats": [
+        ("unit", "unit TEXT NOT NULL DEFAULT ''"),
+        ("kind", "kind TEXT NOT NULL DEFAULT 'numeric'"),
+    ],
+    "entries": [
+        ("day", "day TEXT"),
+        ("value_num", "value_num REAL"),
+        ("value_bool", "value_bool INTEGER"),
+        ("value_hits", "value_hits INTEGER"),
+        ("value_total", "value_total INTEGER"),
+        ("note", "note TEXT"),
+        ("created_at", "created_at TEXT"),
+        ("daily", "daily INTEGER"),
+    ],
+}
 
 
 def _entries_table_has_unique_day(conn: sqlite3.Connection) -> bool:
@@ -47,23 +228,24 @@ def _entries_table_has_unique_day(conn: sqlite3.Connection) -> bool:
 
 
 def init_db():
-    conn = db()
-    cur = conn.cursor()
+    conn = _connect()
+    stats_cols = _table_columns(conn, "stats")
+    entries_cols = _table_columns(conn, "entries")
 
-    # Stats table (kinds: numeric, ratio, count_daily)
-    cur.execute("""
+    script = [
+        "BEGIN;",
+        # Stats table (kinds: numeric, ratio, count_daily)
+        """
         CREATE TABLE IF NOT EXISTS stats (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
             unit TEXT NOT NULL DEFAULT '',
             kind TEXT NOT NULL DEFAULT 'numeric',
             created_at TEXT NOT NULL
-        )
-    """)
-    conn.commit()
-
-    # Create entries table if missing (NOTE: NO UNIQUE(stat_id, day))
-    cur.execute("""
+        );
+        """,
+        # Create entries table if missing (NOTE: NO UNIQUE(stat_id, day))
+        """
         CREATE TABLE IF NOT EXISTS entries (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             stat_id INTEGER NOT NULL,
@@ -74,30 +256,46 @@ def init_db():
             value_total INTEGER,               -- ratio stats (total)
             note TEXT,
             created_at TEXT NOT NULL,
+            daily INTEGER,                     -- 1 on count_daily rows (one per stat and day)
             FOREIGN KEY(stat_id) REFERENCES stats(id) ON DELETE CASCADE
-        )
-    """)
-    conn.commit()
-
-    # Ensure columns exist (for older DBs)
+        );
+        """,
+    ]
+    # Ensure columns exist (for older DBs). A table that doesn't exist yet is
+    # created above with every column, so only existing tables need ALTERs.
+    for table, cols in (("stats", stats_cols), ("entries", entries_cols)):
+        if cols:
+            script.extend(
+                f"ALTER TABLE {table} ADD COLUMN {ddl};"
+                for col, ddl in _ADDED_COLUMNS[table]
+                if col not in cols
+            )
+    script.append("COMMIT;")
+
+    # One script, one transaction: a single commit instead of one per statement.
     try:
-        add_column_if_missing(conn, "stats", "unit", "unit TEXT NOT NULL DEFAULT ''")
-        add_column_if_missing(conn, "stats", "kind", "kind TEXT NOT NULL DEFAULT 'numeric'")
-
-        add_column_if_missing(conn, "entries", "day", "day TEXT")
-        add_column_if_missing(conn, "entries", "value_num", "value_num REAL")
-        add_column_if_missing(conn, "entries", "value_bool", "value_bool INTEGER")
-        add_column_if_missing(conn, "entries", "value_hits", "value_hits INTEGER")
-        add_column_if_missing(conn, "entries", "value_total", "value_total INTEGER")
-        add_column_if_missing(conn, "entries", "note", "note TEXT")
-        add_column_if_missing(conn, "entries", "created_at", "created_at TEXT")
+        conn.executescript("\n".join(script))
     except Exception:
-        pass
+        if conn.in_transaction:
+            conn.rollback()
+        # Missing columns are best-effort, but a table we failed to create is fatal.
+        if not (stats_cols and entries_cols):
+            raise
+
+    # The migrations below scan entries, so they only run until they have all
+    # succeeded once; a failed one leaves user_version alone and is retried next start.
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        conn.close()
+        return
+    migrated = True
 
-    # Best-effort migration from the very first version (entries had "value" column, no day)
+    # Best-effort migration from the very first version (entries had "value" column, no day).
+    # The rebuild runs in one BEGIN IMMEDIATE transaction and copies every row with a
+    # single INSERT ... SELECT, so it is one commit and can't stop half-way.
     try:
-        entries_cols = _table_columns(conn, "entries")
+        # entries_cols was read before the ALTERs above; they never add or drop "value".
         if "value" in entries_cols:
+            conn.execute("BEGIN IMMEDIATE")
             conn.execute("ALTER TABLE entries RENAME TO entries_old")
 
             conn.execute("""
@@ -111,29 +309,34 @@ def init_db():
                     value_total INTEGER,
                     note TEXT,
                     created_at TEXT NOT NULL,
+                    daily INTEGER,
                     FOREIGN KEY(stat_id) REFERENCES stats(id) ON DELETE CASCADE
                 )
             """)
 
-            old_rows = conn.execute("SELECT * FROM entries_old ORDER BY id ASC").fetchall()
-            for r in old_rows:
-                created = r["created_at"] or datetime.utcnow().isoformat()
-                derived_day = created.split("T")[0] if "T" in created else created[:10]
-                conn.execute(
-                    "INSERT INTO entries (stat_id, day, value_num, value_bool, value_hits, value_total, note, created_at) "
-                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                    (r["stat_id"], derived_day, r["value"], None, None, None, r["note"], created),
-                )
-
+            # day is derived from created_at: the part before "T", else its first 10 chars.
+            conn.execute(
+                "INSERT INTO entries (stat_id, day, value_num, value_bool, value_hits, value_total, note, created_at) "
+                "SELECT stat_id, "
+                "CASE WHEN instr(created, 'T') THEN substr(created, 1, instr(created, 'T') - 1) "
+                "ELSE substr(created, 1, 10) END, "
+                "value, NULL, NULL, NULL, note, created "
+                "FROM (SELECT id, stat_id, value, note, COALESCE(NULLIF(created_at, ''), ?) AS created "
+                "FROM entries_old) ORDER BY id ASC",
+                (datetime.utcnow().isoformat(),),
+            )
             conn.execute("DROP TABLE entries_old")
             conn.commit()
     except Exception:
-        pass
+        migrated = False
+        if conn.in_transaction:
+            conn.rollback()
 
     # Migration: remove UNIQUE(stat_id, day) if it exists in the entries table definition.
-    # SQLite can't drop constraints, so we rebuild the table.
+    # SQLite can't drop constraints, so we rebuild the table (same single-transaction copy).
     try:
         if _entries_table_has_unique_day(conn):
+            conn.execute("BEGIN IMMEDIATE")
             conn.execute("ALTER TABLE entries RENAME TO entries_old2")
 
             conn.execute("""
@@ -147,27 +350,23 @@ def init_db():
                     value_total INTEGER,
                     note TEXT,
                     created_at TEXT NOT NULL,
+                    daily INTEGER,
                     FOREIGN KEY(stat_id) REFERENCES stats(id) ON DELETE CASCADE
                 )
             """)
 
-            old_rows = conn.execute("SELECT * FROM entries_old2 ORDER BY id ASC").fetchall()
-            for r in old_rows:
-                conn.execute(
-                    "INSERT INTO entries (id, stat_id, day, value_num, value_bool, value_hits, value_total, note, created_at) "
-                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                    (
-                        r["id"], r["stat_id"], r["day"],
-                        r["value_num"], r["value_bool"], r["value_hits"], r["value_total"],
-                        r["note"], r["created_at"]
-                    ),
-                )
-
+            conn.execute(
+                "INSERT INTO entries (id, stat_id, day, value_num, value_bool, value_hits, value_total, note, created_at, daily) "
+                "SELECT id, stat_id, day, value_num, value_bool, value_hits, value_total, note, created_at, daily "
+                "FROM entries_old2 ORDER BY id ASC"
+            )
             conn.execute("DROP TABLE entries_old2")
             conn.commit()
     except Exception:
         # If anything goes wrong, the app can still run; worst case you can back up DB and retry.
-        pass
+        migrated = False
+        if conn.in_transaction:
+            conn.rollback()
 
     # Migration: convert any existing boolean_daily stats into count_daily
     # and convert "true" entries into value_num=1.
@@ -176,229 +375,173 @@ def init_db():
         conn.execute("UPDATE entries SET value_num = 1 WHERE value_bool = 1 AND value_num IS NULL")
         conn.commit()
     except Exception:
-        pass
+        migrated = False
 
+    # Migration: tag count_daily rows written before the daily column existed, keep
+    # only the newest row per stat and day (the old app enforced that in Python),
+    # then let a partial unique index enforce it for the UPSERTs.
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "UPDATE entries SET daily = 1 "
+            "WHERE daily IS NULL AND stat_id IN (SELECT id FROM stats WHERE kind = 'count_daily')"
+        )
+        conn.execute(
+            "DELETE FROM entries WHERE daily = 1 AND id NOT IN "
+            "(SELECT MAX(id) FROM entries WHERE daily = 1 GROUP BY stat_id, day)"
+        )
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_entries_count_daily ON entries(stat_id, day) WHERE daily = 1"
+        )
+        conn.commit()
+    except Exception:
+        migrated = False
+        if conn.in_transaction:
+            conn.rollback()
+
+    # Index for the stat detail queries (WHERE stat_id = ? ORDER BY day DESC, id DESC),
+    # so they are a range scan with no sort step. It supersedes the earlier
+    # (stat_id, day DESC) index. Created after the migrations above, since
+    # rebuilding entries drops its indexes.
+    has_index = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='index' AND name='idx_entries_stat_day_id'"
+    ).fetchone()
+    if not has_index:
+        conn.execute("CREATE INDEX idx_entries_stat_day_id ON entries(stat_id, day DESC, id DESC)")
+        conn.execute("DROP INDEX IF EXISTS idx_entries_stat_day_desc")
+        conn.execute("ANALYZE")
+        conn.commit()
+
+    if migrated:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     conn.close()
 
 
-init_db()
-
-
-def layout(title: str, body: str) -> str:
-    return f"""<!doctype html>
-<html>
-<head>
-  <link rel="apple-touch-icon" href="/assets/apple-touch-icon.png">
-  <link rel="manifest" href="/manifest.webmanifest">
-  <meta name="theme-color" content="#111111">
-
-  <meta name="apple-mobile-web-app-capable" content="yes">
-  <meta name="apple-mobile-web-app-status-bar-style" content="default">
-  <meta name="apple-mobile-web-app-title" content="Stat Tracker">
-  <meta charset="utf-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1" />
-  <title>{title}</title>
-  <style>
-    body {{
-      font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif;
-      margin: 0;
-      background: #fafafa;
-      color: #111;
-    }}
-    .wrap {{
-      max-width: 420px;
-      margin: 0 auto;
-      padding: 16px;
-    }}
-    h1 {{ font-size: 22px; margin: 8px 0 4px; }}
-    p {{ color: #555; margin-top: 0; }}
-
-    .card {{
-      background: #fff;
-      border: 1px solid #e5e5e5;
-      border-radius: 16px;
-      padding: 14px;
-      box-shadow: 0 1px 2px rgba(0,0,0,.04);
-      margin: 12px 0;
-    }}
-
-    input, button, textarea, select {{
-      width: 100%;
-      box-sizing: border-box;
-      font-size: 16px;
-      padding: 10px 12px;
-      border-radius: 12px;
-      border: 1px solid #ddd;
-      margin-top: 6px;
-      background: #fff;
-    }}
-
-    button {{
-      background: #111;
-      color: white;
-      border: none;
-      font-weight: 600;
-      margin-top: 10px;
-    }}
-
-    .btn-secondary {{
-      background: #f4f4f5;
-      color: #111;
-      border: 1px solid #e5e5e5;
-    }}
-
-    .btn-danger {{
-      background: #ef4444;
-      color: white;
-    }}
-
-    a {{ color: inherit; text-decoration: none; }}
-    .muted {{ color: #666; font-size: 13px; }}
-
-    .row {{
-      display: flex;
-      gap: 10px;
-    }}
-    .row > * {{
-      flex: 1;
-    }}
-
-    /* Stats list */
-    .stat-row {{
-      display: flex;
-      gap: 10px;
-      align-items: stretch;
-      margin-top: 10px;
-    }}
-    .stat-link {{
-      flex: 1;
-      display: flex;
-      justify-content: space-between;
-      align-items: center;
-      padding: 12px;
-      border-radius: 14px;
-      border: 1px solid #eee;
-      background: #fff;
-    }}
-    .stat-actions {{
-      width: 92px;
-      display: flex;
-    }}
-    .stat-actions form {{
-      width: 100%;
-      margin: 0;
-    }}
-    .stat-actions button {{
-      margin-top: 0;
-      width: 100%;
-      padding: 10px 10px;
-      border-radius: 14px;
-      font-size: 14px;
-    }}
-
-    /* Entries list */
-    .entry {{
-      border-top: 1px solid #eee;
-      padding: 10px 0;
-      display: flex;
-      justify-content: space-between;
-      gap: 10px;
-      align-items: start;
-    }}
-    .entry:first-child {{ border-top: none; }}
-    .entry-main {{ flex: 1; }}
-    .entry-actions form {{ margin: 0; }}
-    .entry-actions button {{
-      margin-top: 0;
-      padding: 8px 10px;
-      border-radius: 12px;
-      font-size: 13px;
-    }}
-  </style>
-</head>
-<body>
-  <div class="wrap">
-    {body}
-  </div>
-</body>
-</html>
-"""
+def _start_wal_checkpointer() -> None:
+    global _checkpoint_thread
+    _checkpoint_stop.clear()
+    _checkpoint_thread = threading.Thread(target=_checkpoint_loop, name="wal-checkpoint", daemon=True)
+    _checkpoint_thread.start()
+
+
+def _stop_wal_checkpointer() -> None:
+    _checkpoint_stop.set()
+    if _checkpoint_thread is not None:
+        _checkpoint_thread.join()
+
+
+def _open_db() -> None:
+    global _pools_open
+    with _pools_lock:
+        if _pools_open:
+            return
+        init_db()
+        _fill_pools()
+        _pools_open = True
+
+
+# Schema setup and the connection pools live for the server's lifetime rather
+# than the import, so importing the module (or each worker forking) stays cheap.
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    _open_db()
+    _start_wal_checkpointer()
+    try:
+        yield
+    finally:
+        _stop_wal_checkpointer()
+        _drain_pools()
+
+
+app = FastAPI(lifespan=lifespan)
+app.mount("/assets", StaticFiles(directory="assets"), name="assets")
+
+
+def _now_iso() -> str:
+    # Second resolution is all created_at needs, and keeps the stored strings short.
+    return datetime.utcnow().isoformat(timespec="seconds")
+
+
+_KIND_LABELS = {"numeric": "Numeric", "count_daily": "Daily count", "ratio": "Hits / Total"}
 
 
 def kind_label(stat_kind: str) -> str:
-    if stat_kind == "numeric":
-        return "Numeric"
-    if stat_kind == "count_daily":
-        return "Daily count"
-    if stat_kind == "ratio":
-        return "Hits / Total"
-    return "Numeric"
+    return _KIND_LABELS.get(stat_kind, "Numeric")
+
+
+# Templates are compiled once and kept (no reload checks); autoescape covers the
+# user-supplied stat names, units and notes.
+templates = Environment(
+    loader=FileSystemLoader("templates"),
+    autoescape=True,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False,
+    cache_size=-1,
+)
+templates.globals["kind_label"] = kind_label
+
+# Load every page up front: the shared layout's static markup is compiled into
+# constant strings once, and requests skip the loader lookup entirely.
+_HOME_TEMPLATE = templates.get_template("home.html")
+_DETAIL_TEMPLATES = {
+    "numeric": templates.get_template("numeric_detail.html"),
+    "count_daily": templates.get_template("count_detail.html"),
+    "ratio": templates.get_template("ratio_detail.html"),
+}
+
+
+# The home page only depends on the stats table, which changes solely through
+# create_stat/delete_stat, so the rendered HTML is kept until one of them runs.
+# The generation counter stops a render that raced with a write from being cached.
+_home_cache: Optional[str] = None
+_home_cache_gen = 0
+_home_cache_lock = threading.Lock()
+
+
+def _invalidate_home_cache() -> None:
+    global _home_cache, _home_cache_gen
+    with _home_cache_lock:
+        _home_cache = None
+        _home_cache_gen += 1
 
 
 @app.get("/", response_class=HTMLResponse)
-def home():
-    conn = db()
-    stats = conn.execute("SELECT * FROM stats ORDER BY id DESC").fetchall()
-    conn.close()
+async def home(before: Optional[int] = None):
+    # A cache hit does no blocking work, so it is answered on the event loop;
+    # only a miss needs the threadpool for the SQLite query and render.
+    # Only the first page is cached; older pages are rare.
+    if before is None:
+        cached = _home_cache
+        if cached is not None:
+            return cached
+    return await run_in_threadpool(_render_home, before)
+
+
+def _render_home(before: Optional[int] = None) -> str:
+    global _home_cache
+    gen = _home_cache_gen
+
+    with read_conn() as conn:
+        # One extra row tells whether there is an older page.
+        stats = conn.execute(
+            _SQL_HOME_LIST, (before if before is not None else 2**63 - 1, HOME_PAGE_SIZE + 1)
+        ).fetchall()
+        stat_count = conn.execute(_SQL_STAT_COUNT).fetchone()[0]
 
-    stats_html = ""
-    if not stats:
-        stats_html = '<div class="muted">No stats yet — add “Weight (kg)”, “Workouts”, or “Bullseyes”.</div>'
-    else:
-        for s in stats:
-            k = s["kind"]
-            unit_part = f" • Unit: {s['unit']}" if k == "numeric" and s["unit"] else ""
-            stats_html += f"""
-              <div class="stat-row">
-                <a class="stat-link" href="/stat/{s['id']}">
-                  <div>
-                    <div><b>{s['name']}</b></div>
-                    <div class="muted">{kind_label(k)}{unit_part}</div>
-                  </div>
-                  <div class="muted">›</div>
-                </a>
-
-                <div class="stat-actions">
-                  <form method="post" action="/stat/{s['id']}/delete">
-                    <button class="btn-danger" type="submit">Delete</button>
-                  </form>
-                </div>
-              </div>
-            """
-
-    body = f"""
-      <h1>Stat Tracker</h1>
-      <p>Create a statistic, then tap it to add entries.</p>
-
-      <div class="card">
-        <b>Create new statistic</b>
-        <form method="post" action="/stats">
-          <label class="muted">Type</label>
-          <select name="kind">
-            <option value="numeric" selected>Numeric (e.g. Weight)</option>
-            <option value="count_daily">Daily count (e.g. Workouts per day)</option>
-            <option value="ratio">Hits / Total (e.g. Bullseyes)</option>
-          </select>
-
-          <label class="muted">Name</label>
-          <input name="name" placeholder="Weight / Workouts / Bullseyes" required />
-
-          <label class="muted">Unit (numeric only)</label>
-          <input name="unit" placeholder="kg" />
-
-          <button type="submit">Add statistic</button>
-        </form>
-      </div>
-
-      <div class="card">
-        <div style="display:flex;justify-content:space-between;align-items:baseline;">
-          <b>Your statistics</b>
-          <span class="muted">{len(stats)}</span>
-        </div>
-        {stats_html}
-      </div>
-    """
-    return layout("Stat Tracker", body)
+    older_before = None
+    if len(stats) > HOME_PAGE_SIZE:
+        stats = stats[:HOME_PAGE_SIZE]
+        older_before = stats[-1]["id"]
+
+    page = _HOME_TEMPLATE.render(
+        stats=stats, stat_count=stat_count, older_before=older_before, paged=before is not None
+    )
+    if before is None:
+        with _home_cache_lock:
+            if gen == _home_cache_gen:
+                _home_cache = page
+    return page
 
 
 @app.post("/stats")
@@ -412,255 +555,89 @@ def create_stat(name: str = Form(...), kind: str = Form("numeric"), unit: str =
     if kind != "numeric":
         unit_clean = ""
 
-    conn = db()
-    conn.execute(
-        "INSERT INTO stats (name, unit, kind, created_at) VALUES (?, ?, ?, ?)",
-        (name.strip(), unit_clean, kind, datetime.utcnow().isoformat()),
-    )
-    conn.commit()
-    conn.close()
+    with write_conn() as conn:
+        conn.execute(
+            _SQL_INSERT_STAT,
+            (name.strip(), unit_clean, kind, _now_iso()),
+        )
+        conn.commit()
+    _invalidate_home_cache()
     return RedirectResponse("/", status_code=303)
 
 
-@app.get("/stat/{stat_id}", response_class=HTMLResponse)
-def stat_detail(stat_id: int):
-    conn = db()
-    stat = conn.execute("SELECT * FROM stats WHERE id = ?", (stat_id,)).fetchone()
-    if not stat:
-        conn.close()
-        return HTMLResponse("Not found", status_code=404)
-
-    kind = stat["kind"]
+# Rendered stat pages, least recently used first. A page only changes when a
+# write touches its stat (each write handler drops that stat's page) or when the
+# day rolls over, since the forms are prefilled with today's date. As with the
+# home page, the generation counter keeps a render that raced with a write out.
+STAT_PAGE_CACHE_SIZE = 256
+_stat_page_cache: "OrderedDict[int, Tuple[str, str]]" = OrderedDict()
+_stat_page_cache_gen = 0
+_stat_page_cache_lock = threading.Lock()
 
-    # ---- Ratio UI (hits / total) ----
-    if kind == "ratio":
-        entries = conn.execute(
-            "SELECT * FROM entries WHERE stat_id = ? ORDER BY day DESC, id DESC LIMIT 100",
-            (stat_id,),
-        ).fetchall()
-        conn.close()
 
-        entries_html = ""
-        if not entries:
-            entries_html = '<div class="muted">No entries yet.</div>'
-        else:
-            for e in entries:
-                hits = e["value_hits"] if e["value_hits"] is not None else 0
-                total = e["value_total"] if e["value_total"] is not None else 0
-                pct = (hits / total * 100.0) if total else 0.0
-                note = f"<div class='muted'>{e['note']}</div>" if e["note"] else ""
-                entries_html += f"""
-                  <div class="entry">
-                    <div class="entry-main">
-                      <div><b>{hits}/{total}</b> <span class="muted">({pct:.1f}%) • {e['day']}</span></div>
-                      {note}
-                    </div>
-                    <div class="entry-actions">
-                      <form method="post" action="/entry/{e['id']}/delete">
-                        <input type="hidden" name="stat_id" value="{stat_id}" />
-                        <button class="btn-secondary" type="submit">Remove</button>
-                      </form>
-                    </div>
-                  </div>
-                """
-
-        body = f"""
-          <div style="margin-bottom:10px;">
-            <a class="muted" href="/">← Back</a>
-          </div>
-
-          <h1>{stat['name']}</h1>
-          <p class="muted">Type: Hits / Total • Multiple entries per day allowed.</p>
-
-          <div class="card">
-            <b>Add entry</b>
-            <form method="post" action="/stat/{stat_id}/ratio">
-              <div class="row">
-                <div>
-                  <label class="muted">Hits</label>
-                  <input name="hits" inputmode="numeric" placeholder="7" required />
-                </div>
-                <div>
-                  <label class="muted">Total</label>
-                  <input name="total" inputmode="numeric" placeholder="50" required />
-                </div>
-              </div>
-
-              <label class="muted">Day (YYYY-MM-DD)</label>
-              <input name="day" placeholder="{date.today().isoformat()}" />
-
-              <label class="muted">Note (optional)</label>
-              <textarea name="note" rows="2" placeholder="Practice session details..."></textarea>
-
-              <button type="submit">Save entry</button>
-            </form>
-          </div>
-
-          <div class="card">
-            <b>Recent entries</b>
-            {entries_html}
-          </div>
-        """
-        return layout(f"{stat['name']} — Stat Tracker", body)
+def _invalidate_stat_page(stat_id: int) -> None:
+    global _stat_page_cache_gen
+    with _stat_page_cache_lock:
+        _stat_page_cache.pop(stat_id, None)
+        _stat_page_cache_gen += 1
 
-    # ---- Daily count UI (workouts) ----
-    if kind == "count_daily":
-        entries = conn.execute(
-            "SELECT * FROM entries WHERE stat_id = ? ORDER BY day DESC LIMIT 60",
-            (stat_id,),
-        ).fetchall()
-        conn.close()
 
-        entries_html = ""
-        if not entries:
-            entries_html = '<div class="muted">No entries yet.</div>'
+@app.get("/stat/{stat_id}", response_class=HTMLResponse)
+async def stat_detail(stat_id: int):
+    today = date.today().isoformat()
+    with _stat_page_cache_lock:
+        cached = _stat_page_cache.get(stat_id)
+        if cached is not None and cached[0] == today:
+            _stat_page_cache.move_to_end(stat_id)
+            return cached[1]
+    return await run_in_threadpool(_render_stat_page, stat_id, today)
+
+
+def _render_stat_page(stat_id: int, today: str) -> Union[str, HTMLResponse]:
+    gen = _stat_page_cache_gen
+
+    with read_conn() as conn:
+        stat = conn.execute(_SQL_STAT_BY_ID, (stat_id,)).fetchone()
+        if not stat:
+            return HTMLResponse("Not found", status_code=404)
+
+        kind = stat["kind"]
+        if kind == "ratio":
+            entries = conn.execute(_SQL_RATIO_ENTRIES_BY_STAT, (stat_id,)).fetchall()
+        elif kind == "count_daily":
+            entries = conn.execute(_SQL_DAILY_ENTRIES_BY_STAT, (stat_id,)).fetchall()
         else:
-            for e in entries:
-                note = f"<div class='muted'>{e['note']}</div>" if e["note"] else ""
-                val = int(e["value_num"]) if e["value_num"] is not None else 0
-                entries_html += f"""
-                  <div class="entry">
-                    <div class="entry-main">
-                      <div><b>{val}</b> <span class="muted">• {e['day']}</span></div>
-                      {note}
-                    </div>
-                    <div class="entry-actions">
-                      <form method="post" action="/entry/{e['id']}/delete">
-                        <input type="hidden" name="stat_id" value="{stat_id}" />
-                        <button class="btn-secondary" type="submit">Remove</button>
-                      </form>
-                    </div>
-                  </div>
-                """
-
-        body = f"""
-          <div style="margin-bottom:10px;">
-            <a class="muted" href="/">← Back</a>
-          </div>
-
-          <h1>{stat['name']}</h1>
-          <p class="muted">Type: Daily count • One entry per day (edits overwrite that day).</p>
-
-          <div class="card">
-            <b>Quick add</b>
-
-            <form method="post" action="/stat/{stat_id}/count/increment">
-              <input type="hidden" name="day" value="{date.today().isoformat()}" />
-              <button type="submit">+1 (Today)</button>
-            </form>
-
-            <div class="muted" style="margin-top:8px;">
-              Tip: use this after each workout session.
-            </div>
-          </div>
-
-          <div class="card">
-            <b>Set workouts for a day</b>
-            <form method="post" action="/stat/{stat_id}/count">
-              <label class="muted">Count</label>
-              <input name="count" inputmode="numeric" placeholder="1" required />
-
-              <label class="muted">Day (YYYY-MM-DD)</label>
-              <input name="day" placeholder="{date.today().isoformat()}" />
-
-              <label class="muted">Note (optional)</label>
-              <textarea name="note" rows="2" placeholder="Optional note..."></textarea>
-
-              <button type="submit">Save</button>
-            </form>
-          </div>
-
-          <div class="card">
-            <b>Recent days</b>
-            {entries_html}
-          </div>
-        """
+            entries = conn.execute(_SQL_NUMERIC_ENTRIES_BY_STAT, (stat_id,)).fetchall()
 
-        return layout(f"{stat['name']} — Stat Tracker", body)
-
-    # ---- Numeric UI (default) ----
-    entries = conn.execute(
-        "SELECT * FROM entries WHERE stat_id = ? ORDER BY day DESC, id DESC LIMIT 100",
-        (stat_id,),
-    ).fetchall()
-    conn.close()
-
-    entries_html = ""
-    if not entries:
-        entries_html = '<div class="muted">No entries yet.</div>'
-    else:
-        for e in entries:
-            note = f"<div class='muted'>{e['note']}</div>" if e["note"] else ""
-            entries_html += f"""
-              <div class="entry">
-                <div class="entry-main">
-                  <div><b>{e['value_num']}</b> {stat['unit']} <span class="muted">({e['day']})</span></div>
-                  {note}
-                </div>
-                <div class="entry-actions">
-                  <form method="post" action="/entry/{e['id']}/delete">
-                    <input type="hidden" name="stat_id" value="{stat_id}" />
-                    <button class="btn-secondary" type="submit">Remove</button>
-                  </form>
-                </div>
-              </div>
-            """
-
-    body = f"""
-      <div style="margin-bottom:10px;">
-        <a class="muted" href="/">← Back</a>
-      </div>
-
-      <h1>{stat['name']}</h1>
-      <p class="muted">Type: Numeric • Unit: {stat['unit']} • Multiple entries per day allowed.</p>
-
-      <div class="card">
-        <b>Add entry</b>
-        <form method="post" action="/stat/{stat_id}/entries">
-          <label class="muted">Value</label>
-          <input name="value" inputmode="decimal" placeholder="82.4" required />
-
-          <label class="muted">Day (YYYY-MM-DD)</label>
-          <input name="day" placeholder="{date.today().isoformat()}" />
-
-          <label class="muted">Note (optional)</label>
-          <textarea name="note" rows="2" placeholder="Optional note..."></textarea>
-
-          <button type="submit">Save entry</button>
-        </form>
-      </div>
-
-      <div class="card">
-        <b>Recent entries</b>
-        {entries_html}
-      </div>
-    """
-    return layout(f"{stat['name']} — Stat Tracker", body)
+    template = _DETAIL_TEMPLATES.get(kind, _DETAIL_TEMPLATES["numeric"])
+    page = template.render(stat=stat, entries=entries, today=today)
+    with _stat_page_cache_lock:
+        if gen == _stat_page_cache_gen:
+            _stat_page_cache[stat_id] = (today, page)
+            _stat_page_cache.move_to_end(stat_id)
+            if len(_stat_page_cache) > STAT_PAGE_CACHE_SIZE:
+                _stat_page_cache.popitem(last=False)
+    return page
 
 
 @app.post("/stat/{stat_id}/entries")
 def add_numeric_entry(stat_id: int, value: str = Form(...), day: str = Form(""), note: str = Form("")):
     d = (day or "").strip() or date.today().isoformat()
     v = float(value.replace(",", "."))
-
-    conn = db()
-    stat = conn.execute("SELECT kind FROM stats WHERE id = ?", (stat_id,)).fetchone()
-    if not stat:
-        conn.close()
-        return RedirectResponse("/", status_code=303)
-
-    if stat["kind"] != "numeric":
-        conn.close()
+    if not math.isfinite(v):
         return RedirectResponse(f"/stat/{stat_id}", status_code=303)
 
-    # IMPORTANT: allow multiple entries per day => plain INSERT (no REPLACE)
-    conn.execute(
-        "INSERT INTO entries (stat_id, day, value_num, value_bool, value_hits, value_total, note, created_at) "
-        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-        (stat_id, d, v, None, None, None, note.strip() or None, datetime.utcnow().isoformat()),
-    )
-    conn.commit()
-    conn.close()
+    with write_conn() as conn:
+        # IMPORTANT: allow multiple entries per day => plain INSERT (no REPLACE).
+        # The kind check is part of the INSERT, so nothing is written for a wrong/missing stat.
+        cur = conn.execute(
+            _SQL_INSERT_ENTRY_FOR_KIND,
+            (stat_id, d, v, None, None, None, note.strip() or None, _now_iso(), stat_id, "numeric"),
+        )
+        if cur.rowcount == 0 and conn.execute(_SQL_STAT_KIND, (stat_id,)).fetchone() is None:
+            return RedirectResponse("/", status_code=303)
+        conn.commit()
+    _invalidate_stat_page(stat_id)
     return RedirectResponse(f"/stat/{stat_id}", status_code=303)
 
 
@@ -679,24 +656,16 @@ def add_ratio_entry(
     if t <= 0 or h < 0 or h > t:
         return RedirectResponse(f"/stat/{stat_id}", status_code=303)
 
-    conn = db()
-    stat = conn.execute("SELECT kind FROM stats WHERE id = ?", (stat_id,)).fetchone()
-    if not stat:
-        conn.close()
-        return RedirectResponse("/", status_code=303)
-
-    if stat["kind"] != "ratio":
-        conn.close()
-        return RedirectResponse(f"/stat/{stat_id}", status_code=303)
-
-    # IMPORTANT: allow multiple entries per day => plain INSERT (no REPLACE)
-    conn.execute(
-        "INSERT INTO entries (stat_id, day, value_num, value_bool, value_hits, value_total, note, created_at) "
-        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-        (stat_id, d, None, None, h, t, note.strip() or None, datetime.utcnow().isoformat()),
-    )
-    conn.commit()
-    conn.close()
+    with write_conn() as conn:
+        # IMPORTANT: allow multiple entries per day => plain INSERT (no REPLACE)
+        cur = conn.execute(
+            _SQL_INSERT_ENTRY_FOR_KIND,
+            (stat_id, d, None, None, h, t, note.strip() or None, _now_iso(), stat_id, "ratio"),
+        )
+        if cur.rowcount == 0 and conn.execute(_SQL_STAT_KIND, (stat_id,)).fetchone() is None:
+            return RedirectResponse("/", status_code=303)
+        conn.commit()
+    _invalidate_stat_page(stat_id)
     return RedirectResponse(f"/stat/{stat_id}", status_code=303)
 
 
@@ -709,32 +678,23 @@ def set_daily_count(
 ):
     """
     Enforce "one entry per day" *only* for count_daily stats (e.g. workouts).
-    We do that in application logic (not DB constraint).
+    The partial unique index idx_entries_count_daily backs this, so saving a day
+    overwrites its existing row.
     """
     d = (day or "").strip() or date.today().isoformat()
     c = int(count.strip())
     if c < 0:
         c = 0
 
-    conn = db()
-    stat = conn.execute("SELECT kind FROM stats WHERE id = ?", (stat_id,)).fetchone()
-    if not stat:
-        conn.close()
-        return RedirectResponse("/", status_code=303)
-
-    if stat["kind"] != "count_daily":
-        conn.close()
-        return RedirectResponse(f"/stat/{stat_id}", status_code=303)
-
-    # Delete any existing rows for that day for this stat, then insert a single canonical row.
-    conn.execute("DELETE FROM entries WHERE stat_id = ? AND day = ?", (stat_id, d))
-    conn.execute(
-        "INSERT INTO entries (stat_id, day, value_num, value_bool, value_hits, value_total, note, created_at) "
-        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-        (stat_id, d, float(c), None, None, None, note.strip() or None, datetime.utcnow().isoformat()),
-    )
-    conn.commit()
-    conn.close()
+    with write_conn() as conn:
+        cur = conn.execute(
+            _SQL_UPSERT_DAILY_COUNT,
+            (stat_id, d, float(c), note.strip() or None, _now_iso(), stat_id),
+        )
+        if cur.rowcount == 0 and conn.execute(_SQL_STAT_KIND, (stat_id,)).fetchone() is None:
+            return RedirectResponse("/", status_code=303)
+        conn.commit()
+    _invalidate_stat_page(stat_id)
     return RedirectResponse(f"/stat/{stat_id}", status_code=303)
 
 @app.post("/stat/{stat_id}/count/increment")
@@ -748,67 +708,60 @@ def increment_daily_count(
     """
     d = (day or "").strip() or date.today().isoformat()
 
-    conn = db()
-    stat = conn.execute("SELECT kind FROM stats WHERE id = ?", (stat_id,)).fetchone()
-    if not stat:
-        conn.close()
-        return RedirectResponse("/", status_code=303)
-
-    if stat["kind"] != "count_daily":
-        conn.close()
-        return RedirectResponse(f"/stat/{stat_id}", status_code=303)
-
-    row = conn.execute(
-        "SELECT id, value_num FROM entries WHERE stat_id = ? AND day = ? ORDER BY id DESC LIMIT 1",
-        (stat_id, d),
-    ).fetchone()
-
-    current = int(row["value_num"]) if row and row["value_num"] is not None else 0
-    new_val = current + 1
-
-    # Enforce one entry per day: replace existing row for that day
-    conn.execute("DELETE FROM entries WHERE stat_id = ? AND day = ?", (stat_id, d))
-    conn.execute(
-        "INSERT INTO entries (stat_id, day, value_num, value_bool, value_hits, value_total, note, created_at) "
-        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-        (stat_id, d, float(new_val), None, None, None, None, datetime.utcnow().isoformat()),
-    )
-    conn.commit()
-    conn.close()
+    with write_conn() as conn:
+        cur = conn.execute(
+            _SQL_UPSERT_DAILY_INCREMENT,
+            (stat_id, d, _now_iso(), stat_id),
+        )
+        if cur.rowcount == 0 and conn.execute(_SQL_STAT_KIND, (stat_id,)).fetchone() is None:
+            return RedirectResponse("/", status_code=303)
+        conn.commit()
+    _invalidate_stat_page(stat_id)
     return RedirectResponse(f"/stat/{stat_id}", status_code=303)
 
 
 @app.post("/stat/{stat_id}/delete")
 def delete_stat(stat_id: int):
-    conn = db()
-    conn.execute("DELETE FROM stats WHERE id = ?", (stat_id,))
-    conn.commit()
-    conn.close()
+    with write_conn() as conn:
+        conn.execute(_SQL_DELETE_STAT, (stat_id,))
+        conn.commit()
+    _invalidate_stat_page(stat_id)
+    _invalidate_home_cache()
     return RedirectResponse("/", status_code=303)
 
 
 @app.post("/entry/{entry_id}/delete")
 def delete_entry(entry_id: int, stat_id: int = Form(...)):
-    conn = db()
-    conn.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
-    conn.commit()
-    conn.close()
+    with write_conn() as conn:
+        # The owning stat comes from the deleted row, not the form, so the right page is dropped.
+        row = conn.execute(_SQL_DELETE_ENTRY, (entry_id,)).fetchone()
+        conn.commit()
+    if row:
+        _invalidate_stat_page(row["stat_id"])
     return RedirectResponse(f"/stat/{stat_id}", status_code=303)
 
 
+# The manifest never changes, so it is encoded once and browsers may cache it for a day.
+_MANIFEST_BYTES = json.dumps(
+    {
+        "name": "Stat Tracker",
+        "short_name": "Stats",
+        "start_url": "/",
+        "display": "standalone",
+        "background_color": "#fafafa",
+        "theme_color": "#111111",
+        "icons": [
+            {"src": "/assets/apple-touch-icon.png", "sizes": "180x180", "type": "image/png"}
+        ],
+    },
+    separators=(",", ":"),
+).encode()
+
+
 @app.get("/manifest.webmanifest")
-def manifest():
-    return JSONResponse(
-        {
-            "name": "Stat Tracker",
-            "short_name": "Stats",
-            "start_url": "/",
-            "display": "standalone",
-            "background_color": "#fafafa",
-            "theme_color": "#111111",
-            "icons": [
-                {"src": "/assets/apple-touch-icon.png", "sizes": "180x180", "type": "image/png"}
-            ],
-        },
+async def manifest():
+    return Response(
+        _MANIFEST_BYTES,
         media_type="application/manifest+json",
+        headers={"Cache-Control": "public, max-age=86400"},
     )